@@ -1,25 +1,51 @@
 import streamlit as st
 import os
-from typing import List, Dict, Any
-from datetime import datetime
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Iterator, Tuple
+from datetime import datetime, timedelta, timezone
 import json
-import streamlit as st  
+import hashlib
+import threading
+import queue
+import time
+import re
+from itertools import islice, zip_longest
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl, urlencode
 
-# LangChain imports
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.tools import TavilySearchResults
+# LangChain imports (provider clients are imported lazily where they are built)
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 
-# LangGraph imports
-from langgraph.graph import StateGraph, START, END
+# LangGraph imports (graph building and checkpointing are imported lazily)
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
-from langgraph.checkpoint.memory import MemorySaver
 from typing_extensions import Annotated, TypedDict
 
+# Checkpoint database shared by all research runs
+CHECKPOINT_DB = "agent_state.db"
+
+# Seconds a completed research run is served from its checkpoint before being refreshed
+RESEARCH_TTL = 1800
+
+# Maximum number of planner sub-queries searched concurrently
+MAX_SUBQUERIES = 5
+
+# Maximum number of unique sources kept after merging sub-query results
+MAX_SOURCES = 10
+
+# Token budgets for source bodies passed to the analyzer, per source and across all sources
+SOURCE_TOKEN_LIMIT = 500
+CONTENT_TOKEN_LIMIT = 8000
+
+# Rough characters per token, used when the tokenizer cannot be loaded
+CHARS_PER_TOKEN = 4
+
+# Number of recent research runs rendered by default
+HISTORY_PAGE_SIZE = 5
+
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -34,40 +60,144 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Prompt used by the report generator
+REPORT_TEMPLATE = """
+Based on the research query "{query}" and the following information, create a comprehensive research report:
+
+Search Results Summary:
+{search_summary}
+
+Analysis Results:
+{analysis}
+
+Please provide:
+1. An executive summary
+2. Key findings
+3. Sources used
+4. Recommendations
+
+Write in a clear, professional manner.
+"""
+
 class ResearchReport(BaseModel):
     """Structure for research reports"""
+    # summary comes first so it is generated, and can be streamed, before the lists
     topic: str = Field(description="The research topic")
+    summary: str = Field(description="Summary of the research")
     key_findings: List[str] = Field(description="List of key findings")
     sources: List[str] = Field(description="List of sources used")
-    summary: str = Field(description="Summary of the research")
     recommendations: List[str] = Field(description="Recommendations based on research")
 
+class Plan(BaseModel):
+    """Structure for the research plan"""
+    subqueries: List[str] = Field(description="Specific, searchable web queries covering the topic")
+
+# Matches lines longer than 50 characters once surrounding whitespace is stripped
+_KEYLINE_RE = re.compile(r"^[^\S\n]*(\S[^\n]{49,}\S)[^\S\n]*$", re.M)
+
+@lru_cache(maxsize=128)
+def _extract_key_points(content: str) -> Tuple[str, ...]:
+    """Extract the first five key lines, memoized on identical content"""
+    return tuple(m.group(1) for m in islice(_KEYLINE_RE.finditer(content), 5))
+
 @tool
 def analyze_research_content(content: str, topic: str) -> Dict[str, Any]:
     """Analyze research content and extract key insights"""
     # This is a simplified analysis tool
     # In a real application, you might use more sophisticated NLP techniques
     
-    lines = content.split('\n')
-    key_points = [line.strip() for line in lines if line.strip() and len(line.strip()) > 50]
+    key_points = list(_extract_key_points(content))
     
     return {
         "topic": topic,
         "content_length": len(content),
-        "key_points": key_points[:5],  # Top 5 key points
+        "key_points": key_points,  # Top 5 key points
         "analysis_timestamp": datetime.now().isoformat()
     }
 
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tokenizer on first use, or None if it is unavailable"""
+    try:
+        import tiktoken
+        # The BPE file is downloaded on first use, which fails without network access
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def clip_tokens(text: str, limit: int) -> Tuple[str, int]:
+    """Truncate text to at most `limit` tokens, returning the text and its token count"""
+    enc = _get_encoding()
+    if enc is None:
+        # Approximate with a character budget
+        max_chars = limit * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text, -(-len(text) // CHARS_PER_TOKEN)
+        return text[:max_chars], limit
+    
+    # Web pages may contain literal special tokens such as <|endoftext|>; treat them as plain text
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= limit:
+        return text, len(tokens)
+    return enc.decode(tokens[:limit]), limit
+
+# Query parameters that only track the visit and never change the page
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid"}
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for deduplication by dropping the fragment and tracking parameters"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        # Malformed URLs (e.g. an unclosed IPv6 bracket) are keyed as-is
+        return url.strip()
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ))
+    key = f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    return f"{key}?{query}" if query else key
+
+def research_thread_id(query: str) -> str:
+    """Deterministic thread id so repeated queries reuse their checkpoints"""
+    return "research_" + hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+
+def last_completed_node(values: Dict[str, Any]) -> str:
+    """Infer the last node whose output is present in a partially completed state ("" if none)"""
+    if values.get("analysis"):
+        return "analyzer"
+    if values.get("search_results"):
+        return "searcher"
+    if values.get("subqueries"):
+        return "planner"
+    return ""
+
+def format_report(report: Dict[str, Any], include_summary: bool = True) -> str:
+    """Render a structured research report as markdown"""
+    sections = [f"#### Executive Summary\n\n{report.get('summary', '')}"] if include_summary else []
+    
+    for title, key in (("Key Findings", "key_findings"), ("Recommendations", "recommendations"), ("Sources Used", "sources")):
+        if report.get(key):
+            bullets = "\n".join(f"- {item}" for item in report[key])
+            sections.append(f"#### {title}\n\n{bullets}")
+    
+    return "\n\n".join(sections)
+
 # Define the state
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
     research_query: str
+    subqueries: List[str]
     search_results: List[Dict[str, Any]]
     analysis: Dict[str, Any]
-    final_report: str
+    final_report: Dict[str, Any]
+    completed_at: float
 
 class ResearchAssistantAgent:
     def __init__(self, groq_api_key: str, tavily_api_key: str):  # Fixed: __init__ instead of _init_
+        from langchain_groq import ChatGroq
+        from langchain_community.tools import TavilySearchResults
+        
         # Initialize the LLM with a current supported model
         self.llm = ChatGroq(
             groq_api_key=groq_api_key,
@@ -86,63 +216,112 @@ class ResearchAssistantAgent:
         
         self.tools = [self.search_tool, analyze_research_content]
         
+        # Parse the report prompt once rather than on every run
+        self._report_prompt = ChatPromptTemplate.from_template(REPORT_TEMPLATE)
+        
+        # Force the ResearchReport tool call; its partial arguments can be streamed
+        self._report_llm = self.llm.bind_tools([ResearchReport], tool_choice="ResearchReport")
+        
+        # One long-lived event loop runs every research coroutine. The cached agent is shared across
+        # Streamlit script threads, and its async HTTP clients must always be driven from the same loop
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="research-agent-loop", daemon=True).start()
+        
+        # Threads currently being run by this process; the agent is shared across sessions
+        self._active_threads = set()
+        self._active_threads_lock = threading.Lock()
+        
+        # When expired checkpoint threads were last swept from CHECKPOINT_DB
+        self._last_sweep = 0.0
+        
         # Create the agent workflow
         self.workflow = self._create_workflow()
         
     def _create_workflow(self):
         """Create the LangGraph workflow"""
+        from langgraph.graph import StateGraph, START, END
         
         # Define the nodes
-        def research_planner(state: AgentState):
+        async def research_planner(state: AgentState):
             """Plan the research approach"""
             messages = state["messages"]
             system_message = SystemMessage(content="""
             You are a research planning assistant. Analyze the user's request and create a research plan.
-            Break down complex topics into specific, searchable queries.
-            Respond with a clear research strategy.
+            Break down complex topics into 3 to 5 specific, searchable queries.
             """)
             
-            response = self.llm.invoke([system_message] + messages)
-            
             # Extract research query from the user's message
             user_message = next((msg.content for msg in messages if isinstance(msg, HumanMessage)), "")
             
+            planner_error = ""
+            try:
+                planner_llm = self.llm.with_structured_output(Plan)
+                plan = await planner_llm.ainvoke([system_message] + messages)
+                subqueries = [q.strip() for q in plan.subqueries if q.strip()][:MAX_SUBQUERIES]
+            except Exception as e:
+                planner_error = str(e)
+                subqueries = []
+            
+            # Fall back to the raw user message if planning produced nothing usable
+            if not subqueries:
+                subqueries = [user_message]
+            
+            plan_summary = "Research plan:\n" + "\n".join(f"- {q}" for q in subqueries)
+            if planner_error:
+                plan_summary = f"Planning failed ({planner_error}); searching the original query.\n\n{plan_summary}"
+            
             return {
-                "messages": [response],
-                "research_query": user_message
+                "messages": [AIMessage(content=plan_summary)],
+                "research_query": user_message,
+                "subqueries": subqueries
             }
         
-        def web_searcher(state: AgentState):
+        async def web_searcher(state: AgentState):
             """Perform web search"""
             query = state["research_query"]
+            subqueries = state.get("subqueries") or [query]
             
-            try:
-                search_results = self.search_tool.invoke(query)
-                
-                # Format search results
-                formatted_results = []
-                for result in search_results:
-                    if isinstance(result, dict):
-                        formatted_results.append({
-                            "title": result.get("title", ""),
-                            "content": result.get("content", ""),
-                            "url": result.get("url", "")
-                        })
-                
-                search_summary = f"Found {len(formatted_results)} relevant sources for: {query}"
-                
-                return {
-                    "messages": [AIMessage(content=search_summary)],
-                    "search_results": formatted_results
-                }
-                
-            except Exception as e:
-                return {
-                    "messages": [AIMessage(content=f"Search error: {str(e)}")],
-                    "search_results": []
-                }
+            # Run all sub-queries concurrently
+            batches = await asyncio.gather(
+                *[self.search_tool.ainvoke(q) for q in subqueries],
+                return_exceptions=True
+            )
+            
+            # The search tool reports failures either by raising or by returning an error string
+            errors = [str(batch) for batch in batches if not isinstance(batch, list)]
+            if len(errors) == len(batches):
+                # Fail the node so the run is not completed (and checkpointed) without sources
+                raise RuntimeError(f"Search error: {errors[0]}")
+            
+            # Interleave results round-robin so every sub-query contributes before the cut
+            successful = [batch for batch in batches if isinstance(batch, list)]
+            interleaved = (result for row in zip_longest(*successful) for result in row)
+            
+            # Format search results, keeping the first hit per normalized URL
+            seen = {}
+            for result in interleaved:
+                if not isinstance(result, dict):
+                    continue
+                url = result.get("url", "")
+                key = normalize_url(url) if url else result.get("title", "")
+                seen.setdefault(key, {
+                    "title": result.get("title", ""),
+                    "content": result.get("content", ""),
+                    "url": url
+                })
+            
+            formatted_results = list(seen.values())[:MAX_SOURCES]
+            
+            search_summary = f"Found {len(formatted_results)} relevant sources for: {query}"
+            if errors:
+                search_summary += f" ({len(errors)} of {len(batches)} searches failed: {errors[0]})"
+            
+            return {
+                "messages": [AIMessage(content=search_summary)],
+                "search_results": formatted_results
+            }
         
-        def content_analyzer(state: AgentState):
+        async def content_analyzer(state: AgentState):
             """Analyze the search results"""
             search_results = state.get("search_results", [])
             query = state.get("research_query", "")
@@ -153,11 +332,19 @@ class ResearchAssistantAgent:
                     "analysis": {}
                 }
             
-            # Combine all content for analysis
-            combined_content = "\n\n".join([
-                f"Title: {result['title']}\nContent: {result['content']}"
-                for result in search_results
-            ])
+            # Load the tokenizer off the event loop; the first load may download its BPE file
+            await asyncio.to_thread(_get_encoding)
+            
+            # Combine all content for analysis, encoding each body once against the shared budget
+            sections = []
+            remaining = CONTENT_TOKEN_LIMIT
+            for result in search_results:
+                if remaining <= 0:
+                    break
+                content, used = clip_tokens(result['content'], min(SOURCE_TOKEN_LIMIT, remaining))
+                remaining -= used
+                sections.append(f"Title: {result['title']}\nContent: {content}")
+            combined_content = "\n\n".join(sections)
             
             # Use the analysis tool
             analysis_result = analyze_research_content.invoke({
@@ -170,52 +357,48 @@ class ResearchAssistantAgent:
                 "analysis": analysis_result
             }
         
-        def report_generator(state: AgentState):
+        async def report_generator(state: AgentState, config: RunnableConfig):
             """Generate the final research report"""
             search_results = state.get("search_results", [])
             analysis = state.get("analysis", {})
             query = state.get("research_query", "")
             
-            # Create a comprehensive prompt for report generation
-            report_prompt = ChatPromptTemplate.from_template("""
-            Based on the research query "{query}" and the following information, create a comprehensive research report:
-            
-            Search Results Summary:
-            {search_summary}
-            
-            Analysis Results:
-            {analysis}
-            
-            Please provide:
-            1. Executive Summary
-            2. Key Findings (with bullet points)
-            3. Detailed Analysis
-            4. Sources Used
-            5. Recommendations
-            
-            Format the report in a clear, professional manner with proper sections.
-            """)
-            
             # Prepare the data for the prompt
-            search_summary = "\n".join([
-                f"• {result['title']}: {result['content'][:200]}..."
+            search_summary = "\n".join(
+                f"• {result['title']}: {result['content'][:150]}..."
                 for result in search_results[:3]  # Top 3 results
-            ])
+            )
             
-            analysis_text = json.dumps(analysis, indent=2)
+            # Only the fields the model can use, serialized compactly to save prompt tokens
+            analysis_text = json.dumps(
+                {k: analysis[k] for k in ("key_points", "content_length") if k in analysis},
+                separators=(",", ":")
+            )
             
             # Generate the report
-            formatted_prompt = report_prompt.format(
+            formatted_prompt = self._report_prompt.format(
                 query=query,
                 search_summary=search_summary,
                 analysis=analysis_text
             )
             
-            report_response = self.llm.invoke([HumanMessage(content=formatted_prompt)])
+            # Have the model fill in the report schema, streaming so the summary can be surfaced early
+            response = None
+            async for chunk in self._report_llm.astream([HumanMessage(content=formatted_prompt)], config):
+                response = chunk if response is None else response + chunk
+            
+            if response is None or not response.tool_calls:
+                raise ValueError("Report generation returned no structured report")
+            report = ResearchReport.model_validate(response.tool_calls[0]["args"])
+            
+            # Fall back to the URLs we actually searched if the model cited none
+            if not report.sources:
+                report.sources = [result["url"] for result in search_results if result["url"]]
             
             return {
-                "messages": [report_response],
-                "final_report": report_response.content
+                "messages": [AIMessage(content=report.summary)],
+                "final_report": report.model_dump(),
+                "completed_at": time.time()
             }
         
         # Create the workflow graph
@@ -234,34 +417,205 @@ class ResearchAssistantAgent:
         workflow.add_edge("analyzer", "reporter")
         workflow.add_edge("reporter", END)
         
-        # Compile with memory
-        memory = MemorySaver()
-        return workflow.compile(checkpointer=memory)
+        # Compiled per run so the checkpointer is bound to the running event loop
+        return workflow
     
-    def research(self, query: str) -> Dict[str, Any]:
-        """Execute the research workflow"""
+    async def _delete_expired_threads(self, memory) -> None:
+        """Delete checkpoint threads whose latest checkpoint is older than RESEARCH_TTL"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=RESEARCH_TTL)
+        
+        latest = {}
+        async for item in memory.alist(None):
+            thread_id = item.config["configurable"]["thread_id"]
+            ts = datetime.fromisoformat(item.checkpoint["ts"])
+            latest[thread_id] = max(latest.get(thread_id, ts), ts)
+        
+        with self._active_threads_lock:
+            active = set(self._active_threads)
+        
+        for thread_id, ts in latest.items():
+            if ts < cutoff and thread_id not in active:
+                await memory.adelete_thread(thread_id)
+    
+    async def aresearch_stream(self, query: str, result: Dict[str, Any]) -> AsyncIterator[str]:
+        """Execute the research workflow, yielding progress per node and the report summary as it is generated.
+        
+        The final state is written into ``result`` once the stream is exhausted.
+        Concurrent runs of the same query are rejected within this process only;
+        separate processes sharing CHECKPOINT_DB are not coordinated.
+        """
         initial_state = {
             "messages": [HumanMessage(content=query)],
             "research_query": query,
+            "subqueries": [],
             "search_results": [],
             "analysis": {},
-            "final_report": ""
+            "final_report": {},
+            "completed_at": 0.0
         }
         
-        config = {"configurable": {"thread_id": f"research_{datetime.now().timestamp()}"}}
+        thread_id = research_thread_id(query)
+        config = {"configurable": {"thread_id": thread_id}}
+        
+        # Two sessions writing the same thread at once would interleave checkpoints
+        with self._active_threads_lock:
+            if thread_id in self._active_threads:
+                error = "This query is already being researched in another session. Please try again shortly."
+                result.update({
+                    "error": error,
+                    "messages": [AIMessage(content=f"Research failed: {error}")],
+                    "final_report": {}
+                })
+                return
+            self._active_threads.add(thread_id)
         
         try:
-            final_state = self.workflow.invoke(initial_state, config)
-            return final_state
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+            
+            async with AsyncSqliteSaver.from_conn_string(CHECKPOINT_DB) as memory:
+                app = self.workflow.compile(checkpointer=memory)
+                
+                # Periodically drop threads nobody has touched within RESEARCH_TTL so the database stays bounded
+                if time.time() - self._last_sweep >= RESEARCH_TTL:
+                    self._last_sweep = time.time()
+                    await self._delete_expired_threads(memory)
+                
+                snapshot = await app.aget_state(config)
+                
+                # A completed report is only reused for RESEARCH_TTL seconds, then researched afresh
+                completed_at = snapshot.values.get("completed_at")
+                if completed_at and time.time() - completed_at >= RESEARCH_TTL:
+                    await memory.adelete_thread(thread_id)
+                    snapshot = await app.aget_state(config)
+                
+                if snapshot.next:
+                    # Resume an interrupted run from its last completed node
+                    graph_input = None
+                elif snapshot.values.get("final_report"):
+                    # Already completed: serve the checkpointed report
+                    result.update(snapshot.values)
+                    yield format_report(snapshot.values["final_report"])
+                    return
+                elif last_completed_node(snapshot.values):
+                    # A cancelled run can leave no pending node; continue after its last completed one
+                    await app.aupdate_state(config, {}, as_node=last_completed_node(snapshot.values))
+                    graph_input = None
+                else:
+                    graph_input = initial_state
+                
+                # Partial report tool call, used to stream the summary while it is generated
+                report_message = None
+                streamed_summary = ""
+                
+                # Closing the stream explicitly lets LangGraph finish its pending checkpoint
+                # writes if this run is cancelled (contextlib.aclosing needs Python 3.10)
+                events = app.astream(graph_input, config, stream_mode=["messages", "updates", "values"])
+                try:
+                    async for mode, chunk in events:
+                        if mode == "values":
+                            result.update(chunk)
+                            continue
+                        
+                        if mode == "messages":
+                            message, metadata = chunk
+                            if metadata.get("langgraph_node") != "reporter" or not isinstance(message, AIMessageChunk):
+                                continue
+                        
+                            report_message = message if report_message is None else report_message + message
+                            if not report_message.tool_calls:
+                                continue
+                        
+                            summary = report_message.tool_calls[0]["args"].get("summary")
+                            if not isinstance(summary, str):
+                                continue
+                            
+                            # A \uXXXX surrogate pair split across chunks parses to a lone high surrogate; hold it back
+                            if summary and "\ud800" <= summary[-1] <= "\udbff":
+                                summary = summary[:-1]
+                            
+                            if summary.startswith(streamed_summary) and len(summary) > len(streamed_summary):
+                                if not streamed_summary:
+                                    yield "#### Executive Summary\n\n"
+                                yield summary[len(streamed_summary):]
+                                streamed_summary = summary
+                            continue
+                        
+                        for node, update in chunk.items():
+                            if node == "reporter":
+                                report = update["final_report"]
+                                if not streamed_summary:
+                                    yield format_report(report)
+                                    continue
+                                
+                                # Finish the streamed summary, or restate it if the partial stream diverged
+                                if report["summary"].startswith(streamed_summary):
+                                    yield report["summary"][len(streamed_summary):]
+                                else:
+                                    yield f"\n\n{report['summary']}"
+                                yield "\n\n" + format_report(report, include_summary=False)
+                            else:
+                                for message in update.get("messages", []):
+                                    yield f"{message.content}\n\n"
+                finally:
+                    await events.aclose()
         except Exception as e:
-            return {
+            result.update({
                 "error": str(e),
                 "messages": [AIMessage(content=f"Research failed: {str(e)}")],
-                "final_report": f"Error occurred during research: {str(e)}"
-            }
+                "final_report": {}
+            })
+        finally:
+            with self._active_threads_lock:
+                self._active_threads.discard(thread_id)
+    
+    def research_stream(self, query: str, result: Dict[str, Any]) -> Iterator[str]:
+        """Synchronous wrapper around aresearch_stream for Streamlit.
+        
+        The stream runs as a task on the agent's event loop and hands chunks over through a queue.
+        """
+        chunks = queue.Queue()
+        done = object()
+        
+        async def pump():
+            stream = self.aresearch_stream(query, result)
+            try:
+                async for chunk in stream:
+                    chunks.put(chunk)
+            finally:
+                await stream.aclose()
+                chunks.put(done)
+        
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    break
+                yield chunk
+            future.result()
+        finally:
+            # Cancel the run if the caller abandoned the stream (e.g. a Streamlit rerun)
+            if not future.done():
+                future.cancel()
+    
+    def research(self, query: str) -> Dict[str, Any]:
+        """Execute the research workflow"""
+        result = {}
+        for _ in self.research_stream(query, result):
+            pass
+        return result
 
-def validate_api_keys(groq_key: str, tavily_key: str) -> Dict[str, bool]:
-    """Validate API keys by making test calls"""
+@st.cache_resource(show_spinner=False)
+def get_agent(groq_api_key: str, tavily_api_key: str) -> ResearchAssistantAgent:
+    """Build the research agent once per process and share it across sessions"""
+    return ResearchAssistantAgent(groq_api_key, tavily_api_key)
+
+async def _validate_api_keys_async(groq_key: str, tavily_key: str) -> Dict[str, Any]:
+    """Validate API keys by making concurrent test calls"""
+    from langchain_groq import ChatGroq
+    from langchain_community.tools import TavilySearchResults
+    
     validation_results = {
         "groq_valid": False,
         "tavily_valid": False,
@@ -270,20 +624,17 @@ def validate_api_keys(groq_key: str, tavily_key: str) -> Dict[str, bool]:
     }
     
     # Test Groq API with current supported model
-    try:
+    async def test_groq():
         test_llm = ChatGroq(
             groq_api_key=groq_key,
             model_name="llama-3.3-70b-versatile",  # Updated to current supported model
             temperature=0.1
         )
         # Simple test call
-        test_response = test_llm.invoke([HumanMessage(content="Hi")])
-        validation_results["groq_valid"] = True
-    except Exception as e:
-        validation_results["groq_error"] = str(e)
+        await test_llm.ainvoke([HumanMessage(content="Hi")])
     
     # Test Tavily API
-    try:
+    async def test_tavily():
         test_search = TavilySearchResults(
             api_wrapper_kwargs={
                 "tavily_api_key": tavily_key,
@@ -291,13 +642,53 @@ def validate_api_keys(groq_key: str, tavily_key: str) -> Dict[str, bool]:
             }
         )
         # Simple test search
-        test_search.invoke("test")
+        await test_search.ainvoke("test")
+    
+    groq_result, tavily_result = await asyncio.gather(test_groq(), test_tavily(), return_exceptions=True)
+    
+    if isinstance(groq_result, Exception):
+        validation_results["groq_error"] = str(groq_result)
+    else:
+        validation_results["groq_valid"] = True
+    
+    if isinstance(tavily_result, Exception):
+        validation_results["tavily_error"] = str(tavily_result)
+    else:
         validation_results["tavily_valid"] = True
-    except Exception as e:
-        validation_results["tavily_error"] = str(e)
     
     return validation_results
 
+@st.cache_resource(ttl=3600, show_spinner=False)
+def validate_api_keys(groq_key_hash: str, tavily_key_hash: str, _groq_key: str, _tavily_key: str) -> Dict[str, Any]:
+    """Validate API keys, cached on their hashes so the keys never form the cache key"""
+    return asyncio.run(_validate_api_keys_async(_groq_key, _tavily_key))
+
+def render_research(research: Dict[str, Any], idx: int):
+    """Render a single research history entry"""
+    result = research['result']
+    
+    if 'error' in result:
+        st.error(f"Research failed: {result['error']}")
+        return
+    
+    # Display the final report
+    if 'final_report' in result and result['final_report']:
+        st.markdown("### Research Report")
+        st.markdown(format_report(result['final_report']))
+    
+    # Display search results only when asked for, so they aren't re-rendered on every rerun
+    if 'search_results' in result and result['search_results']:
+        if st.checkbox(f"Show sources ({len(result['search_results'])})", key=f"expand_{idx}"):
+            st.markdown("### Sources")
+            for j, source in enumerate(result['search_results'], 1):
+                with st.container():
+                    st.markdown(f"**{j}. {source.get('title', 'Untitled')}**")
+                    if source.get('url'):
+                        st.markdown(f"🔗 [Source Link]({source.get('url')})")
+                    if source.get('content'):
+                        st.markdown(f"{source.get('content')[:300]}...")
+                    st.markdown("---")
+
 def main():
     st.title("🔍 AI Research Assistant")
     st.markdown("Powered by LangChain + LangGraph")
@@ -340,31 +731,33 @@ def main():
         st.error("Tavily API keys should start with 'tvly-'. Please check your .env file.")
         st.stop()
     
-    # Test API keys (optional - can be slow, so make it toggleable)
-    if "api_keys_validated" not in st.session_state:
-        with st.spinner("🔍 Validating API keys..."):
-            validation = validate_api_keys(groq_api_key, tavily_api_key)
-            
-            if not validation["groq_valid"]:
-                st.error(f"❌ Groq API Key Invalid: {validation['groq_error']}")
-                st.info("Please check your Groq API key at https://console.groq.com")
-                st.stop()
-            
-            if not validation["tavily_valid"]:
-                st.error(f"❌ Tavily API Key Invalid: {validation['tavily_error']}")
-                st.info("Please check your Tavily API key at https://tavily.com")
-                st.stop()
-            
-            st.session_state.api_keys_validated = True
-            st.success("✅ All API keys validated successfully!")
+    # Test API keys (cached across reruns and sessions)
+    with st.spinner("🔍 Validating API keys..."):
+        validation = validate_api_keys(
+            hashlib.sha256(groq_api_key.encode()).hexdigest(),
+            hashlib.sha256(tavily_api_key.encode()).hexdigest(),
+            groq_api_key,
+            tavily_api_key
+        )
+    
+    if not validation["groq_valid"] or not validation["tavily_valid"]:
+        # Don't keep a failed validation around for the whole TTL
+        validate_api_keys.clear()
+    
+    if not validation["groq_valid"]:
+        st.error(f"❌ Groq API Key Invalid: {validation['groq_error']}")
+        st.info("Please check your Groq API key at https://console.groq.com")
+        st.stop()
+    
+    if not validation["tavily_valid"]:
+        st.error(f"❌ Tavily API Key Invalid: {validation['tavily_error']}")
+        st.info("Please check your Tavily API key at https://tavily.com")
+        st.stop()
     
     # Initialize the agent with error handling
     try:
-        # Use a simple key since API keys are now from environment
-        if "agent" not in st.session_state:
-            with st.spinner("🚀 Initializing Research Assistant..."):
-                st.session_state.agent = ResearchAssistantAgent(groq_api_key, tavily_api_key)
-            st.success("✅ Research Assistant ready!")
+        with st.spinner("🚀 Initializing Research Assistant..."):
+            agent = get_agent(groq_api_key, tavily_api_key)
     except Exception as e:
         st.error(f"❌ Failed to initialize agent: {str(e)}")
         st.error("Please check your API keys and internet connection.")
@@ -388,7 +781,9 @@ def main():
             if research_query.strip():
                 with st.spinner("Conducting research... This may take a few moments."):
                     try:
-                        result = st.session_state.agent.research(research_query)
+                        # Stage progress is written as each node finishes; the report summary streams as it is generated
+                        result = {}
+                        st.write_stream(agent.research_stream(research_query.strip(), result))
                         
                         # Store in session state
                         st.session_state.research_history.append({
@@ -413,30 +808,26 @@ def main():
     if st.session_state.research_history:
         st.header("Research Results")
         
-        # Show latest research first
-        for i, research in enumerate(reversed(st.session_state.research_history)):
-            with st.expander(f"📊 Research: {research['query'][:50]}... ({research['timestamp']})", expanded=(i==0)):
-                result = research['result']
-                
-                if 'error' in result:
-                    st.error(f"Research failed: {result['error']}")
-                else:
-                    # Display the final report
-                    if 'final_report' in result and result['final_report']:
-                        st.markdown("### Research Report")
-                        st.markdown(result['final_report'])
-                    
-                    # Display search results if available
-                    if 'search_results' in result and result['search_results']:
-                        st.markdown("### Sources")
-                        for j, source in enumerate(result['search_results'], 1):
-                            with st.container():
-                                st.markdown(f"**{j}. {source.get('title', 'Untitled')}**")
-                                if source.get('url'):
-                                    st.markdown(f"🔗 [Source Link]({source.get('url')})")
-                                if source.get('content'):
-                                    st.markdown(f"{source.get('content')[:300]}...")
-                                st.markdown("---")
+        history = st.session_state.research_history
+        
+        # Show the latest runs first; older ones are only rendered on request
+        recent = history[-HISTORY_PAGE_SIZE:]
+        for offset, research in enumerate(reversed(recent)):
+            idx = len(history) - 1 - offset
+            with st.expander(f"📊 Research: {research['query'][:50]}... ({research['timestamp']})", expanded=(offset==0)):
+                render_research(research, idx)
+        
+        older = history[:-HISTORY_PAGE_SIZE]
+        if older:
+            selected_idx = st.selectbox(
+                "Load older run",
+                options=[None] + list(range(len(older) - 1, -1, -1)),
+                format_func=lambda j: "—" if j is None else f"{older[j]['query'][:50]}... ({older[j]['timestamp']})"
+            )
+            if selected_idx is not None:
+                research = older[selected_idx]
+                with st.expander(f"📊 Research: {research['query'][:50]}... ({research['timestamp']})", expanded=True):
+                    render_research(research, selected_idx)
     
     # Sidebar info
     st.sidebar.header("🤖 AI Research Assistant")